@@ -5,26 +5,30 @@ Production-Ready Version
 """
 
 from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect, Response
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+from fastapi.responses import HTMLResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.datastructures import URL
 from pydantic import BaseModel, Field, field_validator
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 import secrets
-import qrcode
-import io
+import segno
 import re
 import base64
-import json
+import orjson
 import logging
 import os
 import time
 import asyncio
-import hashlib
+import anyio
+import functools
+import contextlib
+from dataclasses import dataclass, field
+import gzip
+import struct
+import zlib
+from urllib.parse import quote
 from dotenv import load_dotenv
 
 # ==================== CONFIGURATION ====================
@@ -37,6 +41,13 @@ BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
 HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 8000))
 MAX_PEERS_PER_SESSION = 2
+THREADPOOL_SIZE = 100
+SESSION_IDLE_TTL = 3600  # Sessions with no peers expire after 1 hour
+SESSION_MAX_AGE = 7200  # Every session is force-closed after 2 hours
+CLOSE_TIMEOUT = 5  # Seconds to wait for WebSocket closes during cleanup
+EXPIRY_LOG_INTERVAL = 60  # At most one expiry summary log line per this many seconds
+# Session IDs are url-safe tokens; compiled once and matched with fullmatch (no trailing-newline gap)
+SESSION_ID_RE = re.compile(r'[a-zA-Z0-9_-]{8,64}')
 
 # Logging configuration
 logging.basicConfig(
@@ -48,37 +59,196 @@ logger = logging.getLogger(__name__)
 logger.info(f"🚀 Starting StreamSnatcher in {ENVIRONMENT} mode")
 logger.info(f"📍 Base URL: {BASE_URL}")
 
-# Rate limiter setup
-limiter = Limiter(key_func=get_remote_address)
+# Rate limits per POST endpoint: path -> (max requests, window in seconds)
+RATE_LIMITS = {
+    "/api/create-session": (5, 60),
+    "/api/generate-qr": (20, 60),
+    "/api/contact": (3, 60),
+}
 
 # CSRF Token generation
 def generate_csrf_token():
-    """Generate a secure CSRF token"""
-    return secrets.token_hex(32)
+    """Generate a secure CSRF token (256 bits straight from the OS CSPRNG)"""
+    return os.urandom(32).hex()
+
+# Security headers, encoded once since ENVIRONMENT is fixed for the process lifetime
+SECURITY_HEADERS: tuple[tuple[bytes, bytes], ...] = (
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-frame-options", b"DENY"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"permissions-policy", b"camera=(), microphone=(), geolocation=()"),
+)
+if ENVIRONMENT == "production":
+    SECURITY_HEADERS += (
+        (b"content-security-policy", (
+            b"default-src 'self'; "
+            b"script-src 'self' 'unsafe-inline' https://pagead2.googlesyndication.com; "
+            b"style-src 'self' 'unsafe-inline' https://fonts.googleapis.com; "
+            b"font-src 'self' https://fonts.gstatic.com; "
+            b"img-src 'self' data: blob:; "
+            b"connect-src 'self' wss: ws:; "
+            b"frame-src https://pagead2.googlesyndication.com;"
+        )),
+        (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+    )
 
 # HTTPS Redirect Middleware (for production)
-class HTTPSRedirectMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        if ENVIRONMENT == "production":
-            # Skip HTTPS redirect for local development
-            host = request.headers.get("host", "")
-            if host.startswith("127.0.0.1") or host.startswith("localhost"):
-                return await call_next(request)
-            # Check if request is not HTTPS
-            if request.headers.get("x-forwarded-proto", "http") != "https":
-                url = request.url.replace(scheme="https")
-                return RedirectResponse(url, status_code=301)
-        return await call_next(request)
+class HTTPSRedirectMiddleware:
+    """Pure ASGI middleware redirecting plain-HTTP requests to HTTPS"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or ENVIRONMENT != "production":
+            await self.app(scope, receive, send)
+            return
+
+        host = b""
+        proto = b"http"
+        for key, value in scope["headers"]:
+            if key == b"host":
+                host = value
+            elif key == b"x-forwarded-proto":
+                proto = value
+
+        # Skip HTTPS redirect for local development, and for requests already on HTTPS
+        if host.startswith((b"127.0.0.1", b"localhost")) or proto == b"https":
+            await self.app(scope, receive, send)
+            return
+
+        # Percent-encode like Starlette's RedirectResponse: the decoded path may hold spaces or non-ASCII
+        location = quote(str(URL(scope=scope).replace(scheme="https")), safe=":/%#?=@[]!$&'()*+,;")
+        await send({
+            "type": "http.response.start",
+            "status": 301,
+            "headers": [
+                (b"location", location.encode("ascii")),
+                (b"content-length", b"0"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": b""})
+
+# Security headers middleware
+class SecurityHeadersMiddleware:
+    """Pure ASGI middleware appending security headers to every HTTP response"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), *SECURITY_HEADERS]
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+# Rate limiting middleware
+class RateLimitMiddleware:
+    """Pure ASGI fixed-window rate limiter keyed by client IP, per POST endpoint"""
+
+    def __init__(self, app, limits: dict[str, tuple[int, int]]):
+        self.app = app
+        self.limits = limits
+        # path -> (current window number, {client ip: hits in window})
+        self.windows: dict[str, tuple[int, dict[str, int]]] = {}
+        self.bodies = {
+            path: orjson.dumps({"error": f"Rate limit exceeded: {count} per {period} seconds"})
+            for path, (count, period) in limits.items()
+        }
+
+    async def __call__(self, scope, receive, send):
+        # Only the POST handlers are limited; other methods get a 405 without spending the allowance
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" and scope["method"] == "POST" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        max_requests, period = limit
+        now = time.time()
+        window = int(now // period)
+        current, hits = self.windows.get(path, (None, None))
+        if current != window:
+            # New window: drop every counter from the previous one
+            hits = {}
+            self.windows[path] = (window, hits)
+
+        client = scope.get("client")
+        client_ip = client[0] if client else "127.0.0.1"
+        count = hits.get(client_ip, 0) + 1
+        hits[client_ip] = count
+        if count <= max_requests:
+            await self.app(scope, receive, send)
+            return
+
+        logger.warning("⚠️ Rate limit exceeded for %s at %s", client_ip, path)
+        body = self.bodies[path]
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(int((window + 1) * period - now) + 1).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """Whether an Accept-Encoding value allows gzip, honouring q=0 and the * wildcard"""
+    qualities = {}
+    for item in accept_encoding.lower().split(","):
+        coding, *params = item.split(";")
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip()] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
+
+# Gzip compression that respects q-values
+class AcceptEncodingGZipMiddleware(GZipMiddleware):
+    """GZipMiddleware that skips compression when the client refuses gzip (e.g. gzip;q=0)"""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            accept_encoding = b",".join(v for k, v in scope["headers"] if k == b"accept-encoding")
+            if not accepts_gzip(accept_encoding.decode("latin-1")):
+                await self.app(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
 
 # ==================== APP INITIALIZATION ====================
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run startup work, serve, then shut down (see STARTUP & SHUTDOWN)"""
+    await startup_event()
+    yield
+    await shutdown_event()
+
 app = FastAPI(
     title="StreamSnatcher",
     description="Lightning-fast P2P file transfer powered by WebRTC",
     version="1.0.0",
     docs_url="/api/docs" if ENVIRONMENT == "development" else None,
-    redoc_url="/api/redoc" if ENVIRONMENT == "development" else None
+    redoc_url="/api/redoc" if ENVIRONMENT == "development" else None,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+# Rate limiting (innermost, so CORS preflights are never counted)
+app.add_middleware(RateLimitMiddleware, limits=RATE_LIMITS)
+
 # CORS configuration
 if ENVIRONMENT == "production":
     allowed_origins = [
@@ -99,41 +269,39 @@ app.add_middleware(
 # Add HTTPS redirect middleware (only active in production)
 app.add_middleware(HTTPSRedirectMiddleware)
 
-# Security headers middleware
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    response = await call_next(request)
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    response.headers["Permissions-Policy"] = "camera=(), microphone=(), geolocation=()"
-    if ENVIRONMENT == "production":
-        response.headers["Content-Security-Policy"] = (
-            "default-src 'self'; "
-            "script-src 'self' 'unsafe-inline' https://pagead2.googlesyndication.com; "
-            "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com; "
-            "font-src 'self' https://fonts.gstatic.com; "
-            "img-src 'self' data: blob:; "
-            "connect-src 'self' wss: ws:; "
-            "frame-src https://pagead2.googlesyndication.com;"
-        )
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-    return response
+# Compress text responses (inside the security headers middleware)
+app.add_middleware(AcceptEncodingGZipMiddleware, minimum_size=1024, compresslevel=6)
 
-# Rate limiter state and exception handler
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+# Security headers middleware (outermost, so redirects get the headers too)
+app.add_middleware(SecurityHeadersMiddleware)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
-# Templates
+# Templates (only watch template files for changes while developing)
 templates = Jinja2Templates(directory="app/templates")
+templates.env.auto_reload = ENVIRONMENT == "development"
 
 # Global state
+# Sessions live in process memory: both peers of a session must reach the same
+# worker, so the server runs as a single process (see scripts/streamsnatcher.service)
 sessions = {}
+# Hot per-session fields kept in flat dicts beside the records, so expiry checks
+# and stats read plain numbers instead of walking every session record.
+# Deadlines are on the monotonic clock, immune to wall-clock jumps.
+session_idle_deadlines: dict[str, float] = {}
+session_conn_counts: dict[str, int] = {}
+# Running sum of session_conn_counts, so health/stats never walk every session
+total_connections = 0
+# Socket-closing tasks spawned by expiry timers, referenced until they finish
+_close_tasks: set[asyncio.Task] = set()
+# Session IDs expired since the last summary line, and when that line was logged
+_expired_batch: list[str] = []
+_last_expiry_log = float("-inf")
 
 # ==================== MODELS ====================
+EMAIL_RE = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')
+
 class ContactForm(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     email: str = Field(..., min_length=3, max_length=254)
@@ -143,13 +311,10 @@ class ContactForm(BaseModel):
     @field_validator('email')
     @classmethod
     def validate_email(cls, v):
-        if not re.match(r'^[^@\s]+@[^@\s]+\.[^@\s]+$', v):
+        if not EMAIL_RE.fullmatch(v):
             raise ValueError('Invalid email address')
         return v
 
-class QRRequest(BaseModel):
-    url: str
-
 # ==================== HELPER FUNCTIONS ====================
 def get_seo(title: str, description: str, keywords: str, canonical: str) -> dict:
     """Generate SEO metadata for templates"""
@@ -162,34 +327,79 @@ def get_seo(title: str, description: str, keywords: str, canonical: str) -> dict
         "canonical": canonical
     }
 
-def generate_qr_code(url: str) -> str:
+def _png_chunk(tag: bytes, data: bytes) -> bytes:
+    """Wrap data in a length-prefixed, CRC-suffixed PNG chunk"""
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+def _png_1bit(matrix, scale: int, border: int) -> bytes:
+    """Encode a QR module matrix (1 = dark) as a 1-bit grayscale PNG"""
+    size = (len(matrix) + 2 * border) * scale
+    padding = "0" * (-size % 8)
+    row_bytes = (size + len(padding)) // 8
+    dark, light = "0" * scale, "1" * scale
+    quiet = light * border
+
+    def scanline(bits: str) -> bytes:
+        # Filter type 0 (None) followed by the packed pixel bits
+        return b"\x00" + int(bits + padding, 2).to_bytes(row_bytes, "big")
+
+    blank = scanline("1" * size)
+    rows = [blank] * (border * scale)
+    for modules in matrix:
+        line = scanline(quiet + "".join(dark if m else light for m in modules) + quiet)
+        rows.extend([line] * scale)
+    rows.extend([blank] * (border * scale))
+
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        _png_chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 1, 0, 0, 0, 0)),
+        _png_chunk(b"IDAT", zlib.compress(b"".join(rows), 9)),
+        _png_chunk(b"IEND", b""),
+    ))
+
+def _qr_data_uri(url: str) -> str:
+    """Render a QR code as a base64 PNG data URI"""
+    # segno picks the smallest version that fits; micro=False keeps it scannable by phone cameras
+    qr = segno.make(url, error="m", micro=False)
+    png = _png_1bit(qr.matrix, scale=10, border=4)
+    qr_base64 = base64.b64encode(png).decode()
+    
+    return f"data:image/png;base64,{qr_base64}"
+
+# Only for repeatable URLs: session URLs carry a fresh ID and join token, so they
+# would never hit and would just evict useful entries (and keep tokens alive)
+_cached_qr_data_uri = functools.lru_cache(maxsize=1024)(_qr_data_uri)
+
+def generate_qr_code(url: str, cached: bool = False) -> str:
     """Generate base64 encoded QR code image"""
     try:
-        # Set version=None to allow auto-sizing based on data length
-        qr = qrcode.QRCode(version=None, box_size=10, border=4)
-        qr.add_data(url)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        buffer = io.BytesIO()
-        img.save(buffer, format="PNG")
-        qr_base64 = base64.b64encode(buffer.getvalue()).decode()
-        
-        return f"data:image/png;base64,{qr_base64}"
+        return _cached_qr_data_uri(url) if cached else _qr_data_uri(url)
     except Exception as e:
         logger.error(f"Failed to generate QR code: {e}")
         return ""
 
+# Rendered marketing pages, keyed by canonical URL (one template may back several routes)
+_page_cache: dict[str, bytes] = {}
+
+def static_page(template_name: str, context: dict) -> HTMLResponse:
+    """Serve a page with a fixed context, rendered once per process (every request in development)"""
+    key = context["seo"]["canonical"]
+    body = _page_cache.get(key)
+    if body is None:
+        template = templates.get_template(template_name)
+        body = template.render({**context, "timestamp": int(time.time())}).encode()
+        if ENVIRONMENT != "development":
+            _page_cache[key] = body
+    return HTMLResponse(body)
+
 # ==================== ROUTES ====================
 @app.get("/", response_class=HTMLResponse)
-async def home(request: Request):
+async def home():
     """Homepage route"""
-    return templates.TemplateResponse("index.html", {
-        "request": request,
+    return static_page("index.html", {
         "show_cta": False,
         "page_class": "page-home",
         "breadcrumbs": None,
-        "timestamp": int(time.time()),
         "seo": get_seo(
             "StreamSnatcher - Lightning Fast P2P File Transfer",
             "Transfer files at lightning speed with zero storage. Direct peer-to-peer file sharing powered by WebRTC. No limits, completely free.",
@@ -199,17 +409,15 @@ async def home(request: Request):
     })
 
 @app.get("/about", response_class=HTMLResponse)
-async def about(request: Request):
+async def about():
     """About page route"""
-    return templates.TemplateResponse("about.html", {
-        "request": request,
+    return static_page("about.html", {
         "show_cta": True,
         "page_class": "page-about",
         "breadcrumbs": [
             {"name": "Home", "url": "/"},
             {"name": "About", "url": "/about"}
         ],
-        "timestamp": int(time.time()),
         "seo": get_seo(
             "About StreamSnatcher - Fast & Private P2P File Transfer",
             "Learn about StreamSnatcher and our mission to provide fast, secure, and accessible peer-to-peer file transfers for everyone.",
@@ -219,17 +427,15 @@ async def about(request: Request):
     })
 
 @app.get("/how-it-works", response_class=HTMLResponse)
-async def how_it_works(request: Request):
+async def how_it_works():
     """How It Works page route"""
-    return templates.TemplateResponse("how-it-works.html", {
-        "request": request,
+    return static_page("how-it-works.html", {
         "show_cta": True,
         "page_class": "page-how-it-works",
         "breadcrumbs": [
             {"name": "Home", "url": "/"},
             {"name": "How It Works", "url": "/how-it-works"}
         ],
-        "timestamp": int(time.time()),
         "seo": get_seo(
             "How StreamSnatcher Works - P2P File Transfer Explained",
             "Understand how StreamSnatcher uses WebRTC technology to enable direct peer-to-peer file transfers at maximum speed.",
@@ -239,17 +445,15 @@ async def how_it_works(request: Request):
     })
 
 @app.get("/contact", response_class=HTMLResponse)
-async def contact(request: Request):
+async def contact():
     """Contact page route"""
-    return templates.TemplateResponse("contact.html", {
-        "request": request,
+    return static_page("contact.html", {
         "show_cta": True,
         "page_class": "page-contact",
         "breadcrumbs": [
             {"name": "Home", "url": "/"},
             {"name": "Contact", "url": "/contact"}
         ],
-        "timestamp": int(time.time()),
         "seo": get_seo(
             "Contact StreamSnatcher - Support & Inquiries",
             "Get in touch with the StreamSnatcher team for support, feedback, or business inquiries.",
@@ -259,17 +463,15 @@ async def contact(request: Request):
     })
 
 @app.get("/privacy-policy", response_class=HTMLResponse)
-async def privacy_policy(request: Request):
+async def privacy_policy():
     """Privacy Policy page route"""
-    return templates.TemplateResponse("privacy-policy.html", {
-        "request": request,
+    return static_page("privacy-policy.html", {
         "show_cta": False,
         "page_class": "page-legal",
         "breadcrumbs": [
             {"name": "Home", "url": "/"},
             {"name": "Privacy Policy", "url": "/privacy-policy"}
         ],
-        "timestamp": int(time.time()),
         "seo": get_seo(
             "Privacy Policy - StreamSnatcher",
             "StreamSnatcher's privacy policy explains how we handle your data and protect your privacy during file transfers.",
@@ -279,17 +481,15 @@ async def privacy_policy(request: Request):
     })
 
 @app.get("/terms-of-service", response_class=HTMLResponse)
-async def terms_of_service(request: Request):
+async def terms_of_service():
     """Terms of Service page route"""
-    return templates.TemplateResponse("terms-of-service.html", {
-        "request": request,
+    return static_page("terms-of-service.html", {
         "show_cta": False,
         "page_class": "page-legal",
         "breadcrumbs": [
             {"name": "Home", "url": "/"},
             {"name": "Terms of Service", "url": "/terms-of-service"}
         ],
-        "timestamp": int(time.time()),
         "seo": get_seo(
             "Terms of Service - StreamSnatcher",
             "Read StreamSnatcher's terms of service to understand your rights and responsibilities when using our platform.",
@@ -299,17 +499,15 @@ async def terms_of_service(request: Request):
     })
 
 @app.get("/disclaimer", response_class=HTMLResponse)
-async def disclaimer(request: Request):
+async def disclaimer():
     """Disclaimer page route"""
-    return templates.TemplateResponse("disclaimer.html", {
-        "request": request,
+    return static_page("disclaimer.html", {
         "show_cta": False,
         "page_class": "page-legal",
         "breadcrumbs": [
             {"name": "Home", "url": "/"},
             {"name": "Disclaimer", "url": "/disclaimer"}
         ],
-        "timestamp": int(time.time()),
         "seo": get_seo(
             "Disclaimer - StreamSnatcher",
             "Important disclaimers regarding the use of StreamSnatcher's peer-to-peer file transfer service.",
@@ -319,17 +517,15 @@ async def disclaimer(request: Request):
     })
 
 @app.get("/use-cases", response_class=HTMLResponse)
-async def use_cases(request: Request):
+async def use_cases():
     """Use Cases page route"""
-    return templates.TemplateResponse("use-cases.html", {
-        "request": request,
+    return static_page("use-cases.html", {
         "show_cta": True,
         "page_class": "page-use-cases",
         "breadcrumbs": [
             {"name": "Home", "url": "/"},
             {"name": "Use Cases", "url": "/use-cases"}
         ],
-        "timestamp": int(time.time()),
         "seo": get_seo(
             "Use Cases - StreamSnatcher",
             "Discover how professionals, businesses, and individuals use StreamSnatcher for secure file transfer.",
@@ -339,17 +535,15 @@ async def use_cases(request: Request):
     })
 
 @app.get("/faq", response_class=HTMLResponse)
-async def faq(request: Request):
+async def faq():
     """FAQ page route"""
-    return templates.TemplateResponse("faq.html", {
-        "request": request,
+    return static_page("faq.html", {
         "show_cta": True,
         "page_class": "page-faq",
         "breadcrumbs": [
             {"name": "Home", "url": "/"},
             {"name": "FAQ", "url": "/faq"}
         ],
-        "timestamp": int(time.time()),
         "seo": get_seo(
             "FAQ - StreamSnatcher | Common Questions About P2P File Transfer",
             "Find answers to frequently asked questions about StreamSnatcher's peer-to-peer file transfers, privacy, performance, and browser compatibility.",
@@ -359,17 +553,15 @@ async def faq(request: Request):
     })
 
 @app.get("/blog", response_class=HTMLResponse)
-async def blog_index(request: Request):
+async def blog_index():
     """Blog landing page route"""
-    return templates.TemplateResponse("blog.html", {
-        "request": request,
+    return static_page("blog.html", {
         "show_cta": True,
         "page_class": "page-blog",
         "breadcrumbs": [
             {"name": "Home", "url": "/"},
             {"name": "Blog", "url": "/blog"}
         ],
-        "timestamp": int(time.time()),
         "seo": get_seo(
             "Blog - StreamSnatcher | WebRTC, Privacy & P2P File Transfer",
             "In-depth articles about WebRTC technology, peer-to-peer file transfer, privacy-first sharing, and how StreamSnatcher works.",
@@ -379,10 +571,9 @@ async def blog_index(request: Request):
     })
 
 @app.get("/blog/webrtc-file-transfer-guide", response_class=HTMLResponse)
-async def blog_webrtc_guide(request: Request):
+async def blog_webrtc_guide():
     """Blog post: WebRTC File Transfer Guide"""
-    return templates.TemplateResponse("blog-webrtc-guide.html", {
-        "request": request,
+    return static_page("blog-webrtc-guide.html", {
         "show_cta": True,
         "page_class": "page-blog-post",
         "breadcrumbs": [
@@ -390,7 +581,6 @@ async def blog_webrtc_guide(request: Request):
             {"name": "Blog", "url": "/blog"},
             {"name": "WebRTC File Transfer Guide", "url": "/blog/webrtc-file-transfer-guide"}
         ],
-        "timestamp": int(time.time()),
         "seo": get_seo(
             "WebRTC File Transfer: A Complete Guide - StreamSnatcher",
             "A comprehensive guide to how WebRTC enables direct browser-to-browser file transfers, covering data channels, DTLS encryption, NAT traversal, and practical considerations.",
@@ -400,10 +590,9 @@ async def blog_webrtc_guide(request: Request):
     })
 
 @app.get("/blog/privacy-first-file-sharing", response_class=HTMLResponse)
-async def blog_privacy_p2p(request: Request):
+async def blog_privacy_p2p():
     """Blog post: Privacy-First File Sharing"""
-    return templates.TemplateResponse("blog-privacy-p2p.html", {
-        "request": request,
+    return static_page("blog-privacy-p2p.html", {
         "show_cta": True,
         "page_class": "page-blog-post",
         "breadcrumbs": [
@@ -411,7 +600,6 @@ async def blog_privacy_p2p(request: Request):
             {"name": "Blog", "url": "/blog"},
             {"name": "Privacy-First File Sharing", "url": "/blog/privacy-first-file-sharing"}
         ],
-        "timestamp": int(time.time()),
         "seo": get_seo(
             "Privacy-First File Sharing: Why P2P Matters in 2026 - StreamSnatcher",
             "An in-depth analysis of why peer-to-peer architecture provides stronger privacy guarantees than cloud storage for file sharing.",
@@ -421,10 +609,9 @@ async def blog_privacy_p2p(request: Request):
     })
 
 @app.get("/blog/p2p-vs-cloud-storage", response_class=HTMLResponse)
-async def blog_p2p_vs_cloud(request: Request):
+async def blog_p2p_vs_cloud():
     """Blog post: P2P vs Cloud Storage"""
-    return templates.TemplateResponse("blog-p2p-vs-cloud.html", {
-        "request": request,
+    return static_page("blog-p2p-vs-cloud.html", {
         "show_cta": True,
         "page_class": "page-blog-post",
         "breadcrumbs": [
@@ -432,7 +619,6 @@ async def blog_p2p_vs_cloud(request: Request):
             {"name": "Blog", "url": "/blog"},
             {"name": "P2P vs Cloud Storage", "url": "/blog/p2p-vs-cloud-storage"}
         ],
-        "timestamp": int(time.time()),
         "seo": get_seo(
             "P2P vs. Cloud Storage: Which Is Better for File Transfer? - StreamSnatcher",
             "A detailed comparison of peer-to-peer and cloud-based file transfer across speed, privacy, cost, file size limits, and real-world use cases.",
@@ -442,11 +628,11 @@ async def blog_p2p_vs_cloud(request: Request):
     })
 
 @app.get("/session/{session_id}", response_class=HTMLResponse)
-async def session_page(request: Request, session_id: str):
+def session_page(request: Request, session_id: str):
     """Session page route - loads the app with session context"""
     # Validate session_id format to prevent injection
-    if not re.match(r'^[a-zA-Z0-9_-]{8,64}$', session_id):
-        return JSONResponse(status_code=400, content={"error": "Invalid session ID"})
+    if not SESSION_ID_RE.fullmatch(session_id):
+        return ORJSONResponse(status_code=400, content={"error": "Invalid session ID"})
     return templates.TemplateResponse("index.html", {
         "request": request,
         "show_cta": False,
@@ -463,14 +649,13 @@ async def session_page(request: Request, session_id: str):
     })
 
 # ==================== API ENDPOINTS ====================
-@app.post("/api/create-session")
-@limiter.limit("5/minute")
+@app.post("/api/create-session", response_model=None)
 async def create_session(request: Request):
     """Create a new transfer session with unique ID and QR code"""
     try:
         session_id = secrets.token_urlsafe(16)
         join_token = secrets.token_urlsafe(16)
-        sessions[session_id] = {"connections": [], "join_token": join_token, "created_at": time.time()}
+        new_session(session_id, join_token)
         
         # Always use BASE_URL for production deployment
         session_url = f"{BASE_URL}/session/{session_id}?token={join_token}"
@@ -480,41 +665,51 @@ async def create_session(request: Request):
         logger.info(f"✓ Session created: {session_id}")
         logger.info(f"📍 Session URL: {session_url}")
         
-        return {
+        return ORJSONResponse({
             "session_id": session_id,
             "session_url": session_url,
             "qr_code": qr_code,
             "join_token": join_token
-        }
+        })
     except Exception as e:
         logger.error(f"❌ Failed to create session: {e}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": "Failed to create session"}
         )
 
-@app.post("/api/generate-qr")
-@limiter.limit("20/minute")
-async def generate_qr(request: Request, qr_data: QRRequest):
+@app.post("/api/generate-qr", response_model=None)
+async def generate_qr(request: Request):
     """Generate QR code for any URL (used by receivers)"""
     try:
+        # Body is just {"url": "..."}; parse it directly instead of through a Pydantic model
+        try:
+            body = orjson.loads(await request.body())
+        except orjson.JSONDecodeError:
+            body = None
+        url = body.get("url") if isinstance(body, dict) else None
+        if not isinstance(url, str):
+            return ORJSONResponse(
+                status_code=422,
+                content={"error": "Request body must be a JSON object with a url string"}
+            )
+
         # Validate URL starts with BASE_URL to prevent open redirect / phishing
-        if not qr_data.url.startswith(BASE_URL):
-            return JSONResponse(
+        if not url.startswith(BASE_URL):
+            return ORJSONResponse(
                 status_code=400,
                 content={"error": "Invalid URL — QR codes can only be generated for this site"}
             )
-        qr_code = generate_qr_code(qr_data.url)
-        return {"qr_code": qr_code}
+        qr_code = generate_qr_code(url, cached=True)
+        return ORJSONResponse({"qr_code": qr_code})
     except Exception as e:
         logger.error(f"❌ Failed to generate QR code: {e}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"error": "Failed to generate QR code"}
         )
 
-@app.post("/api/contact")
-@limiter.limit("3/minute")
+@app.post("/api/contact", response_model=None)
 async def submit_contact(request: Request, form: ContactForm):
     """Handle contact form submissions"""
     try:
@@ -529,7 +724,7 @@ async def submit_contact(request: Request, form: ContactForm):
         }
     except Exception as e:
         logger.error(f"❌ Contact form error: {e}")
-        return JSONResponse(
+        return ORJSONResponse(
             status_code=500,
             content={"status": "error", "message": "Failed to send message"}
         )
@@ -537,63 +732,131 @@ async def submit_contact(request: Request, form: ContactForm):
 # ==================== WEBSOCKET - SIGNALING SERVER ====================
 ALLOWED_WS_TYPES = {"register", "offer", "answer", "ice-candidate", "ping", "request-peer-count"}
 MAX_WS_MESSAGE_SIZE = 65536  # 64KB limit for signaling messages
+RELAY_QUEUE_SIZE = 256  # Pending relays per session before new messages are dropped
+
+@dataclass(slots=True)
+class Session:
+    """A signaling session's live state"""
+    join_token: str | None = None
+    connections: set[WebSocket] = field(default_factory=set)
+    relay_queue: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=RELAY_QUEUE_SIZE))
+    relay_task: asyncio.Task | None = None
+    # Pending expiry timers; re-arming one replaces it
+    idle_timer: asyncio.TimerHandle | None = None
+    max_age_timer: asyncio.TimerHandle | None = None
+
+def new_session(session_id: str, join_token: str | None = None) -> Session:
+    """Register a new signaling session and schedule its expiry checks"""
+    session = sessions[session_id] = Session(join_token)
+    session_idle_deadlines[session_id] = time.monotonic() + SESSION_IDLE_TTL
+    session_conn_counts[session_id] = 0
+    schedule_expiry(session_id, SESSION_IDLE_TTL, force=False)
+    schedule_expiry(session_id, SESSION_MAX_AGE, force=True)
+    return session
+
+def set_conn_count(session_id: str, count: int):
+    """Record a session's peer count, keeping the server-wide total in step"""
+    global total_connections
+    total_connections += count - session_conn_counts[session_id]
+    session_conn_counts[session_id] = count
+
+def drop_session(session_id: str):
+    """Forget a session, stop its relay worker and cancel its expiry timers"""
+    session = sessions.pop(session_id, None)
+    session_idle_deadlines.pop(session_id, None)
+    global total_connections
+    total_connections -= session_conn_counts.pop(session_id, 0)
+    if session is None:
+        return
+    if session.relay_task is not None:
+        session.relay_task.cancel()
+    for timer in (session.idle_timer, session.max_age_timer):
+        if timer is not None:
+            timer.cancel()
+
+async def relay_worker(session: Session):
+    """Fan out a session's queued signaling messages to the other peers, in arrival order"""
+    queue = session.relay_queue
+    while True:
+        sender, data = await queue.get()
+        for e in await broadcast_text(session.connections, data, exclude=sender):
+            logger.error("❌ Failed to relay message: %s", e)
+
+# Preserialized signaling payloads; peer counts only range over 0..MAX_PEERS_PER_SESSION
+PONG_MESSAGE = '{"type":"pong"}'
+
+@functools.lru_cache(maxsize=None)
+def peer_joined_message(peer_count: int) -> str:
+    """Serialized peer-joined notification for a given peer count"""
+    return orjson.dumps({
+        "type": "peer-joined",
+        "peer_count": peer_count,
+        "max_peers": MAX_PEERS_PER_SESSION
+    }).decode()
+
+@functools.lru_cache(maxsize=None)
+def peer_left_message(peer_count: int) -> str:
+    """Serialized peer-left notification for a given peer count"""
+    return orjson.dumps({"type": "peer-left", "peer_count": peer_count}).decode()
+
+async def broadcast_text(connections, data: str, exclude: WebSocket | None = None) -> list[BaseException]:
+    """Send a text frame to every connection except `exclude` concurrently, returning the failures"""
+    results = await asyncio.gather(
+        *(conn.send_text(data) for conn in connections if conn is not exclude),
+        return_exceptions=True
+    )
+    return [r for r in results if isinstance(r, BaseException)]
 
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     """WebSocket signaling server for WebRTC peer connections"""
     
     # Validate session_id format
-    if not re.match(r'^[a-zA-Z0-9_-]{8,64}$', session_id):
+    if not SESSION_ID_RE.fullmatch(session_id):
         await websocket.close(code=1008, reason="Invalid session ID")
         return
     
     # Check if session is full before accepting
-    if session_id in sessions and len(sessions[session_id]["connections"]) >= MAX_PEERS_PER_SESSION:
+    if session_id in sessions and len(sessions[session_id].connections) >= MAX_PEERS_PER_SESSION:
         await websocket.close(code=1008, reason="Session full")
-        logger.warning(f"⚠️ Session {session_id} full, connection rejected")
+        logger.warning("⚠️ Session %s full, connection rejected", session_id)
         return
     
-    # Accept connection first (required before any send/close in FastAPI)
-    await websocket.accept()
-    
-    # Authenticate with join token
-    token = websocket.query_params.get("token")
+    # Authenticate with join token before the handshake, so rejected clients never get one
+    token = websocket.query_params.get("token") or ""
     session = sessions.get(session_id)
-    if session and session.get("join_token") and token != session.get("join_token"):
+    if session and session.join_token and not secrets.compare_digest(
+        token.encode(), session.join_token.encode()
+    ):
         logger.warning(f"⚠️ Unauthorized WebSocket attempt for session {session_id}")
         await websocket.close(code=1008, reason="Unauthorized")
         return
 
-    # Initialize session if not exists
-    if session_id not in sessions:
-        sessions[session_id] = {"connections": [], "created_at": time.time()}
-    sessions[session_id]["connections"].append(websocket)
+    await websocket.accept()
+
+    # Bind this handler to one session record: if it expires and the ID is reused
+    # while we are suspended in an await, we must not touch the newcomer's record
+    session = sessions.get(session_id) or new_session(session_id)
+    connections = session.connections
+
+    # Re-check capacity: other peers may have joined while the handshake was awaited.
+    # No await between this check and the append, so the cap cannot be overshot.
+    if len(connections) >= MAX_PEERS_PER_SESSION:
+        await websocket.close(code=1008, reason="Session full")
+        logger.warning("⚠️ Session %s full, connection rejected", session_id)
+        return
+    connections.add(websocket)
+    set_conn_count(session_id, len(connections))
+    if session.relay_task is None:
+        session.relay_task = asyncio.create_task(relay_worker(session))
     
     # Get total count
-    peer_count = len(sessions[session_id]["connections"])
+    peer_count = len(connections)
     logger.info(f"✓ Peer joined session {session_id}. Total: {peer_count}/{MAX_PEERS_PER_SESSION}")
     
-    # Send count to the NEW peer immediately
-    try:
-        await websocket.send_json({
-            "type": "peer-joined",
-            "peer_count": peer_count,
-            "max_peers": MAX_PEERS_PER_SESSION
-        })
-    except Exception as e:
-        logger.error(f"❌ Failed to send to new peer: {e}")
-    
-    # Notify ALL other peers
-    for conn in sessions[session_id]["connections"]:
-        if conn != websocket:
-            try:
-                await conn.send_json({
-                    "type": "peer-joined",
-                    "peer_count": peer_count,
-                    "max_peers": MAX_PEERS_PER_SESSION
-                })
-            except:
-                pass
+    # Send the count to the new peer and notify all other peers at once
+    for e in await broadcast_text(connections, peer_joined_message(peer_count)):
+        logger.error("❌ Failed to send peer-joined: %s", e)
     
     try:
         while True:
@@ -604,21 +867,26 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
                 logger.warning(f"⚠️ Oversized message rejected from session {session_id}")
                 continue
             
-            message = json.loads(data)
-            msg_type = message.get("type")
+            # Every signaling message carries a "type" key; skip the parse for anything that can't
+            if '"type"' not in data:
+                logger.warning("⚠️ Rejected untyped message from session %s", session_id)
+                continue
+            
+            try:
+                message = orjson.loads(data)
+            except orjson.JSONDecodeError:
+                logger.warning("⚠️ Rejected malformed message from session %s", session_id)
+                continue
+            msg_type = message.get("type") if isinstance(message, dict) else None
             
             # Handle ping
             if msg_type == "ping":
-                await websocket.send_json({"type": "pong"})
+                await websocket.send_text(PONG_MESSAGE)
                 continue
             
             # Handle peer count requests
             if msg_type == "request-peer-count":
-                await websocket.send_json({
-                    "type": "peer-joined",
-                    "peer_count": len(sessions[session_id]["connections"]),
-                    "max_peers": MAX_PEERS_PER_SESSION
-                })
+                await websocket.send_text(peer_joined_message(len(connections)))
                 continue
             
             # H1: Only relay allowed message types
@@ -626,67 +894,64 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
                 logger.warning(f"⚠️ Rejected unknown message type: {msg_type}")
                 continue
             
-            # Relay to all other peers
-            for conn in sessions[session_id]["connections"]:
-                if conn != websocket:
-                    try:
-                        await conn.send_text(data)
-                    except Exception as e:
-                        logger.error(f"❌ Failed to relay message: {e}")
+            # Hand off to the session's relay worker and go straight back to receiving.
+            # Never block on a full queue: if the worker is stuck or the session was
+            # dropped, nothing would ever drain it and this handler would hang forever.
+            try:
+                session.relay_queue.put_nowait((websocket, data))
+            except asyncio.QueueFull:
+                logger.warning("⚠️ Relay backlog full, dropped message from session %s", session_id)
                     
     except WebSocketDisconnect:
+        if sessions.get(session_id) is not session:
+            return  # Session already expired and dropped by its timer
+
         # Remove disconnected peer
-        if websocket in sessions[session_id]["connections"]:
-            sessions[session_id]["connections"].remove(websocket)
+        connections.discard(websocket)
+        set_conn_count(session_id, len(connections))
         
-        remaining = len(sessions[session_id]["connections"])
+        remaining = len(connections)
         logger.info(f"⚠️ Peer left session {session_id}. Remaining: {remaining}")
         
         # Notify remaining peers
-        for conn in sessions[session_id]["connections"]:
-            try:
-                await conn.send_json({
-                    "type": "peer-left",
-                    "peer_count": remaining
-                })
-            except:
-                pass
+        await broadcast_text(connections, peer_left_message(remaining))
         
-        # Clean up empty sessions
-        if remaining == 0:
-            del sessions[session_id]
+        # Clean up empty sessions (unless someone rejoined during the broadcast)
+        if not connections and sessions.get(session_id) is session:
+            drop_session(session_id)
             logger.info(f"🗑️ Session {session_id} cleaned up (empty)")
     
     except Exception as e:
         logger.error(f"❌ WebSocket error in session {session_id}: {e}")
-        if websocket in sessions[session_id]["connections"]:
-            sessions[session_id]["connections"].remove(websocket)
+        if sessions.get(session_id) is not session:
+            return
+        connections.discard(websocket)
+        set_conn_count(session_id, len(connections))
+        # Left behind empty: re-arm the idle timer to fire at its original idle deadline
+        if not session_conn_counts[session_id]:
+            idle_left = session_idle_deadlines[session_id] - time.monotonic()
+            schedule_expiry(session_id, max(idle_left, 0), force=False)
 
 # ==================== SEO & METADATA ====================
-@app.get("/ads.txt", response_class=HTMLResponse)
-async def ads_txt():
-    """Serve ads.txt for AdSense verification"""
+# Static for the process lifetime, so build (and compress) them once at import
+def _read_ads_txt() -> bytes:
+    """Read ads.txt from the static directory, empty if it is missing"""
     ads_path = os.path.join("app", "static", "ads.txt")
     if os.path.exists(ads_path):
-        with open(ads_path, "r") as f:
-            return Response(content=f.read(), media_type="text/plain")
-    return Response(content="", media_type="text/plain")
+        with open(ads_path, "rb") as f:
+            return f.read()
+    return b""
 
-@app.get("/robots.txt", response_class=HTMLResponse)
-async def robots():
-    """Robots.txt for search engine crawlers"""
-    domain = BASE_URL.replace("http://", "").replace("https://", "")
-    return f"""User-agent: *
+ADS_TXT = _read_ads_txt()
+
+ROBOTS_TXT = f"""User-agent: *
 Allow: /
 Disallow: /session/
 Disallow: /api/
 
-Sitemap: {BASE_URL}/sitemap.xml"""
+Sitemap: {BASE_URL}/sitemap.xml""".encode()
 
-@app.get("/sitemap.xml")
-async def sitemap():
-    """XML sitemap for search engines"""
-    content = f"""<?xml version="1.0" encoding="UTF-8"?>
+SITEMAP_XML = f"""<?xml version="1.0" encoding="UTF-8"?>
 <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
     <url>
         <loc>{BASE_URL}/</loc>
@@ -766,75 +1031,149 @@ async def sitemap():
         <changefreq>yearly</changefreq>
         <priority>0.5</priority>
     </url>
-</urlset>"""
-    return Response(content=content, media_type="application/xml")
+</urlset>""".encode()
+SITEMAP_GZ = gzip.compress(SITEMAP_XML, compresslevel=9)
+
+@app.get("/ads.txt", response_class=HTMLResponse)
+async def ads_txt():
+    """Serve ads.txt for AdSense verification"""
+    return Response(content=ADS_TXT, media_type="text/plain")
+
+@app.get("/robots.txt", response_class=HTMLResponse)
+async def robots():
+    """Robots.txt for search engine crawlers"""
+    return Response(content=ROBOTS_TXT, media_type="text/plain")
+
+@app.get("/sitemap.xml")
+async def sitemap(request: Request):
+    """XML sitemap for search engines"""
+    if accepts_gzip(request.headers.get("accept-encoding", "")):
+        return Response(
+            content=SITEMAP_GZ,
+            media_type="application/xml",
+            headers={"content-encoding": "gzip", "vary": "Accept-Encoding"}
+        )
+    return Response(content=SITEMAP_XML, media_type="application/xml", headers={"vary": "Accept-Encoding"})
 
 # ==================== HEALTH CHECK ====================
-@app.get("/health")
+@app.get("/health", response_model=None)
 async def health_check():
     """Health check endpoint for monitoring"""
     if ENVIRONMENT == "production":
-        return {"status": "healthy"}
-    return {
+        return ORJSONResponse({"status": "healthy"})
+    return ORJSONResponse({
         "status": "healthy",
         "environment": ENVIRONMENT,
         "active_sessions": len(sessions),
-        "total_connections": sum(len(s["connections"]) for s in sessions.values())
-    }
+        "total_connections": total_connections
+    })
 
-@app.get("/api/stats")
+@app.get("/api/stats", response_model=None)
 async def get_stats():
     """Get server statistics"""
     if ENVIRONMENT == "development":
-        return {
+        return ORJSONResponse({
             "total_sessions": len(sessions),
-            "active_connections": sum(len(s["connections"]) for s in sessions.values()),
-            "sessions": {sid: len(s["connections"]) for sid, s in sessions.items()}
-        }
-    return {"status": "disabled in production"}
+            "active_connections": total_connections,
+            "sessions": session_conn_counts
+        })
+    return ORJSONResponse({"status": "disabled in production"})
 
 # ==================== STARTUP & SHUTDOWN ====================
-@app.on_event("startup")
+BANNER_RULE = "=" * 60
+
 async def startup_event():
     """Application startup"""
-    logger.info("=" * 60)
-    logger.info("🚀 StreamSnatcher Server Started")
-    logger.info(f"📍 Environment: {ENVIRONMENT}")
-    logger.info(f"🌐 Base URL: {BASE_URL}")
-    logger.info(f"👥 Max peers per session: {MAX_PEERS_PER_SESSION}")
-    logger.info("=" * 60)
-    # Start session cleanup task
-    asyncio.create_task(cleanup_stale_sessions())
-
-async def cleanup_stale_sessions():
-    """Remove sessions older than 1 hour, force-close after 2 hours"""
-    while True:
-        await asyncio.sleep(300)  # Check every 5 minutes
-        now = time.time()
-        to_delete = []
-        for sid, s in sessions.items():
-            age = now - s.get("created_at", 0)
-            # Force-close sessions older than 2 hours regardless of connections
-            if age > 7200:
-                for conn in s["connections"]:
-                    try:
-                        await conn.close(code=1001, reason="Session expired")
-                    except Exception:
-                        pass
-                to_delete.append(sid)
-            elif age > 3600 and len(s["connections"]) == 0:
-                to_delete.append(sid)
-        for sid in to_delete:
-            del sessions[sid]
-            logger.info(f"🗑️ Expired stale session: {sid}")
-        if to_delete:
-            logger.info(f"📊 Cleaned up {len(to_delete)} stale sessions")
-
-@app.on_event("shutdown")
+    banner = "\n".join([
+        BANNER_RULE,
+        "🚀 StreamSnatcher Server Started",
+        f"📍 Environment: {ENVIRONMENT}",
+        f"🌐 Base URL: {BASE_URL}",
+        f"👥 Max peers per session: {MAX_PEERS_PER_SESSION}",
+        f"⚙️ Event loop: {type(asyncio.get_running_loop()).__name__}",
+        BANNER_RULE,
+    ])
+    logger.info("%s", banner)
+    # Compile every template up front so no request pays for it
+    for template_name in templates.env.list_templates():
+        templates.env.get_template(template_name)
+    # Render the fixed-context pages into the page cache too (a no-op in development)
+    for page in (home, about, how_it_works, contact, privacy_policy, terms_of_service, disclaimer,
+                 use_cases, faq, blog_index, blog_webrtc_guide, blog_privacy_p2p, blog_p2p_vs_cloud):
+        await page()
+    # Session pages render in the threadpool; raise anyio's default of 40 threads
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+
+def schedule_expiry(session_id: str, delay: float, force: bool):
+    """Arm the session's max-age (force) or idle timer to fire after `delay` seconds, replacing the pending one"""
+    session = sessions[session_id]
+    timer = asyncio.get_running_loop().call_later(delay, expire_session, session_id, force)
+    if force:
+        if session.max_age_timer is not None:
+            session.max_age_timer.cancel()
+        session.max_age_timer = timer
+    else:
+        if session.idle_timer is not None:
+            session.idle_timer.cancel()
+        session.idle_timer = timer
+
+def expire_session(session_id: str, force: bool):
+    """Timer callback: drop a session at its max age (force), or at its idle TTL if it has no peers"""
+    if session_id not in sessions or (not force and session_conn_counts[session_id]):
+        return
+    connections = list(sessions[session_id].connections)
+    # Drop the session first; its sockets are then closed in the background
+    drop_session(session_id)
+    if logger.isEnabledFor(logging.INFO):
+        if not _expired_batch:
+            # Flush once the interval since the last line is up; expiries until then join this batch
+            delay = max(_last_expiry_log + EXPIRY_LOG_INTERVAL - time.monotonic(), 0)
+            asyncio.get_running_loop().call_later(delay, log_expired_batch)
+        _expired_batch.append(session_id)
+    if connections:
+        task = asyncio.create_task(close_connections(connections, "Session expired"))
+        _close_tasks.add(task)
+        task.add_done_callback(_close_tasks.discard)
+
+def log_expired_batch():
+    """Log every session expired since the last summary as a single line"""
+    global _last_expiry_log
+    if not _expired_batch:
+        return
+    if len(_expired_batch) == 1:
+        logger.info("🗑️ Expired stale session: %s", _expired_batch[0])
+    else:
+        logger.info("🗑️ Expired %d stale sessions since last report", len(_expired_batch))
+    _expired_batch.clear()
+    _last_expiry_log = time.monotonic()
+
+async def _safe_close(conn, reason: str):
+    """Close one WebSocket, ignoring peers that already went away or were already closed"""
+    with contextlib.suppress(WebSocketDisconnect, OSError, RuntimeError):
+        await conn.close(code=1001, reason=reason)
+
+async def close_connections(connections, reason: str):
+    """Close WebSockets concurrently, waiting at most CLOSE_TIMEOUT seconds for stragglers"""
+    # TaskGroup: cancelling the caller cancels every close instead of orphaning them
+    try:
+        async with asyncio.timeout(CLOSE_TIMEOUT):
+            async with asyncio.TaskGroup() as tg:
+                for conn in connections:
+                    tg.create_task(_safe_close(conn, reason))
+    except TimeoutError:
+        logger.warning("⚠️ WebSocket closes cancelled after %ss", CLOSE_TIMEOUT)
+
 async def shutdown_event():
     """Application shutdown"""
     logger.info("🛑 StreamSnatcher server shutting down")
-    logger.info(f"📊 Active sessions at shutdown: {len(sessions)}")
+    logger.info("📊 Active sessions at shutdown: %d", len(sessions))
+    log_expired_batch()  # Don't lose a summary still waiting for its interval
+    # uvicorn has already closed every WebSocket (1012) by now; just release what
+    # is left so no expiry timer, relay worker or close task outlives the app
+    for session_id in list(sessions):
+        drop_session(session_id)
+    for task in _close_tasks:
+        task.cancel()
 
 # ==================== MAIN ====================
 if __name__ == "__main__":
@@ -844,5 +1183,10 @@ if __name__ == "__main__":
         host=HOST,
         port=PORT,
         reload=(ENVIRONMENT == "development"),
-        log_level="info"
+        log_level="info",
+        loop="uvloop",
+        http="httptools",
+        ws="websockets",
+        # Sessions live in process memory, so both peers must reach the same worker
+        workers=1
     )
@@ -0,0 +1,39 @@
+import unittest
+from unittest import mock
+
+from fastapi.testclient import TestClient
+
+from app import main
+
+
+class HTTPSRedirectTest(unittest.TestCase):
+    """Plain-HTTP requests in production get a valid, percent-encoded HTTPS Location"""
+
+    def setUp(self):
+        patcher = mock.patch.object(main, "ENVIRONMENT", "production")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = TestClient(main.app, base_url="http://streamsnatcher.com")
+
+    def location(self, path):
+        response = self.client.get(path, follow_redirects=False)
+        self.assertEqual(response.status_code, 301)
+        return response.headers["location"]
+
+    def test_ascii_path_and_query(self):
+        self.assertEqual(self.location("/about?x=1"), "https://streamsnatcher.com/about?x=1")
+
+    def test_space_in_path(self):
+        self.assertEqual(self.location("/a%20b"), "https://streamsnatcher.com/a%20b")
+
+    def test_non_ascii_path(self):
+        self.assertEqual(self.location("/caf%C3%A9"), "https://streamsnatcher.com/caf%C3%A9")
+        self.assertEqual(self.location("/%E6%97%A5"), "https://streamsnatcher.com/%E6%97%A5")
+
+    def test_https_request_not_redirected(self):
+        response = self.client.get("/about", headers={"x-forwarded-proto": "https"}, follow_redirects=False)
+        self.assertEqual(response.status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()